@@ -1,5 +1,7 @@
 """Batch Auction Simulator: simple uniform-price auction CLI."""
 
+from itertools import accumulate, repeat
+
 
 def prompt_float(prompt, min_val=None):
     """Prompt for a float, enforcing minimum if provided."""
@@ -22,10 +24,11 @@ def prompt_int(prompt, min_val=None):
     """Prompt for an int, enforcing minimum if provided."""
     while True:
         raw = input(f"{prompt}: ").strip()
-        if not raw.isdigit() and not (raw.startswith("-") and raw[1:].isdigit()):
+        try:
+            value = int(raw)
+        except ValueError:
             print("Please enter a whole number.")
             continue
-        value = int(raw)
 
         if min_val is not None and value < min_val:
             print(f"Value must be >= {min_val}.")
@@ -70,11 +73,40 @@ def aggregate_levels(orders):
     return bids_levels, asks_levels
 
 
-def cumulative_at_price(bids_levels, asks_levels, p):
-    """Cumulative demand and supply measured at price p."""
-    demand = sum(qty for px, qty in bids_levels.items() if px >= p)
-    supply = sum(qty for px, qty in asks_levels.items() if px <= p)
-    return demand, supply
+def volume_peak(demand, supply):
+    """Max of min(demand, supply) and its tie band (lo, hi) of indices.
+
+    Demand only falls and supply only rises, so volume is unimodal: search for
+    the crossing, then widen over equal volumes.
+    """
+    n = len(demand)
+    left, right = 0, n
+    while left < right:
+        mid = (left + right) // 2
+        if demand[mid] < supply[mid]:
+            right = mid
+        else:
+            left = mid + 1
+
+    best_volume = -1
+    peak = 0
+    for i in (left - 1, left):
+        if 0 <= i < n:
+            volume = min(demand[i], supply[i])
+            if volume > best_volume:
+                best_volume = volume
+                peak = i
+
+    if best_volume <= 0:
+        return 0, peak, peak
+
+    lo = hi = peak
+    while lo > 0 and min(demand[lo - 1], supply[lo - 1]) == best_volume:
+        lo -= 1
+    while hi < n - 1 and min(demand[hi + 1], supply[hi + 1]) == best_volume:
+        hi += 1
+
+    return best_volume, lo, hi
 
 
 def find_clearing_price(bids_levels, asks_levels):
@@ -83,21 +115,16 @@ def find_clearing_price(bids_levels, asks_levels):
     if not candidates:
         return None, 0, None, None
 
-    best_volume = 0
-    price_stats = []
-
-    for price in candidates:
-        demand, supply = cumulative_at_price(bids_levels, asks_levels, price)
-        volume = min(demand, supply)
-        price_stats.append((price, demand, supply, volume))
-
-        if volume > best_volume:
-            best_volume = volume
+    # Cumulative supply at or below each price, demand at or above it.
+    supply = list(accumulate(map(asks_levels.get, candidates, repeat(0))))
+    demand = list(accumulate(map(bids_levels.get, reversed(candidates), repeat(0))))
+    demand.reverse()
 
+    best_volume, lo, hi = volume_peak(demand, supply)
     if best_volume <= 0:
         return None, 0, None, None
 
-    winning_prices = sorted(px for px, _, _, vol in price_stats if vol == best_volume)
+    winning_prices = candidates[lo:hi + 1]
 
     if len(winning_prices) == 1:
         price = winning_prices[0]
@@ -1,15 +1,29 @@
 """Batch auction: uniform clearing price that maximizes volume."""
 
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from bisect import bisect_left, bisect_right
 from collections import deque
+from itertools import accumulate, count, islice, repeat
+from operator import lt
 
+from src.orders import OrderBatch, BUY, MARKET, CANCEL, bid_tick, ask_tick
 
-def clear_batch(orders: List[dict], pre_mid: Optional[float] = None, tick: float = 0.01) -> Tuple[Optional[float], List[dict]]:
+# MARKET orders clear as limits at an extreme price, indexed by side code:
+# a buy is willing to pay "infinity", a sell (or anything else) accepts 0
+_MARKET_PRICE = (1e9, 0.0)
+
+# Sub-tick steps per tick when measuring distance to pre_mid (even, so half-tick mids are exact)
+_MID_STEPS = 1000
+
+
+def clear_batch(orders: Union[OrderBatch, List[dict]], pre_mid: Optional[float] = None,
+                tick: float = 0.01) -> Tuple[Optional[float], List[dict]]:
     """
     Find uniform clearing price, allocate fills in FIFO order.
 
     Args:
-        orders: List of dicts with 'order_id', 'side', 'price', 'qty', 'type', 'timestamp'.
+        orders: OrderBatch, or list of dicts with 'order_id', 'side', 'price', 'qty', 'type',
+                'timestamp' (converted via OrderBatch.from_dicts).
                 MARKET orders treated as limit at extreme prices.
         pre_mid: Pre-auction mid for tie-breaking (optional).
         tick: Tick size for rounding midpoint (default 0.01).
@@ -17,122 +31,208 @@ def clear_batch(orders: List[dict], pre_mid: Optional[float] = None, tick: float
     Returns:
         (clearing_price, fills) where fills is list of {buyer_id, seller_id, price, qty, taker_side}.
     """
-    # Separate bids and asks
-    bids = []
-    asks = []
-
-    for o in orders:
-        if o["type"] == "CANCEL":
-            continue  # Ignore cancels in batch
-        if o["type"] == "IOC":
-            # IOC in batch: treat as limit
-            pass
-
-        side = o["side"]
-        price = o.get("price")
-        qty = o["qty"]
-        order_id = o["order_id"]
-        timestamp = o.get("timestamp", 0)
-
-        if o["type"] == "MARKET":
-            # MARKET buy: willing to pay infinity; MARKET sell: willing to accept 0
-            price = 1e9 if side == "BUY" else 0.0
-
-        if side == "BUY":
-            bids.append({"order_id": order_id, "price": price, "qty": qty, "timestamp": timestamp})
-        else:
-            asks.append({"order_id": order_id, "price": price, "qty": qty, "timestamp": timestamp})
-
-    # Sort bids descending by price, then by timestamp, then by order_id (price-time priority)
-    bids.sort(key=lambda x: (-x["price"], x["timestamp"], x["order_id"]))
-    asks.sort(key=lambda x: (x["price"], x["timestamp"], x["order_id"]))
+    if not isinstance(orders, OrderBatch):
+        orders = OrderBatch.from_dicts(orders)
 
-    # Build aggregate levels
+    # One fused pass over the int8-coded columns classifies each row and
+    # buckets it by price level (arrival order kept within a level), with no
+    # per-row indexing or intermediate price list.
+    # Cancels are ignored, IOC treated as limit, MARKET takes its side's extreme price.
     bid_levels = {}
     ask_levels = {}
-    for b in bids:
-        bid_levels[b["price"]] = bid_levels.get(b["price"], 0) + b["qty"]
-    for a in asks:
-        ask_levels[a["price"]] = ask_levels.get(a["price"], 0) + a["qty"]
-
-    # Find all candidate prices
-    candidates = sorted(set(bid_levels.keys()) | set(ask_levels.keys()))
+    bid_rows = {}
+    ask_rows = {}
+    for i, s, t, p, q in zip(count(), orders.side, orders.otype, orders.price, orders.qty):
+        if t == CANCEL:
+            continue
+        if t == MARKET:
+            p = _MARKET_PRICE[s]
+        if s == BUY:
+            levels, buckets = bid_levels, bid_rows
+        else:
+            levels, buckets = ask_levels, ask_rows
+        if p in levels:
+            levels[p] += q
+            buckets[p].append(i)
+        else:
+            levels[p] = q
+            buckets[p] = [i]
+
+    # Re-key the (few) levels by integer tick count: int hashing and exact
+    # comparisons from here on, and float levels on the same tick merge. Off-grid
+    # limits snap inward (bids down, asks up) so no order trades through its limit
+    per_unit = 1.0 / tick
+    bid_levels, bid_rows = _tick_levels(bid_levels, bid_rows, per_unit, bid_tick)
+    ask_levels, ask_rows = _tick_levels(ask_levels, ask_rows, per_unit, ask_tick)
+
+    # Find all candidate prices (in ticks)
+    candidates = sorted(bid_levels.keys() | ask_levels.keys())
     if not candidates:
         return None, []
 
-    # For each candidate, compute cumulative demand/supply
-    best_volume = 0
-    winners = []
-
-    for p in candidates:
-        demand = sum(q for px, q in bid_levels.items() if px >= p)
-        supply = sum(q for px, q in ask_levels.items() if px <= p)
-        volume = min(demand, supply)
-
-        if volume > best_volume:
-            best_volume = volume
-            winners = [p]
-        elif volume == best_volume and volume > 0:
-            winners.append(p)
+    # Cumulative supply at or below each candidate and demand at or above it,
+    # built with C-level accumulate/map instead of a per-candidate Python loop
+    supply = list(accumulate(map(ask_levels.get, candidates, repeat(0))))
+    demand = list(accumulate(map(bid_levels.get, reversed(candidates), repeat(0))))
+    demand.reverse()
 
+    best_volume, lo, hi = _volume_peak(demand, supply)
     if best_volume == 0:
         return None, []
+    winners = candidates[lo:hi + 1]
 
-    # Tie-break: closest to pre_mid (if tied, pick lowest); if no pre_mid, use midpoint rounded to tick
+    # Tie-break: closest to pre_mid (if tied, pick lowest); if no pre_mid, use midpoint rounded to tick.
+    # Done in integer sub-tick steps so equal distances compare exactly.
     if len(winners) == 1:
-        clearing_price = winners[0]
+        clearing_tick = winners[0]
+    elif pre_mid is not None:
+        mid_steps = round(pre_mid * per_unit * _MID_STEPS)
+        # winners is ascending, so min() keeps the lowest of equally close prices
+        clearing_tick = min(winners, key=lambda t: abs(t * _MID_STEPS - mid_steps))
     else:
-        if pre_mid is not None:
-            # Find minimum distance to pre_mid
-            min_dist = min(abs(p - pre_mid) for p in winners)
-            # Among those with minimum distance, pick the lowest price
-            closest = [p for p in winners if abs(p - pre_mid) == min_dist]
-            clearing_price = min(closest)
-        else:
-            # No pre_mid: use midpoint of tie band rounded to tick
-            midpoint = (winners[0] + winners[-1]) / 2.0
-            clearing_price = round(midpoint / tick) * tick
+        # No pre_mid: use midpoint of tie band rounded to tick
+        clearing_tick = round((winners[0] + winners[-1]) / 2)
+
+    clearing_price = clearing_tick / per_unit
 
-    # Allocate fills at clearing_price, FIFO
-    fills = _allocate_fills(bids, asks, clearing_price, best_volume)
+    # Allocate fills at clearing_price, FIFO among orders marketable at that price
+    fills = _allocate_fills(orders, candidates, bid_rows, ask_rows, clearing_tick, clearing_price, best_volume)
 
     return clearing_price, fills
 
 
-def _allocate_fills(bids: List[dict], asks: List[dict], price: float, target_vol: int) -> List[dict]:
-    """Allocate fills at uniform price, FIFO within each side."""
-    # Filter: only bids >= price and asks <= price
-    valid_bids = [b for b in bids if b["price"] >= price]
-    valid_asks = [a for a in asks if a["price"] <= price]
+def _tick_levels(levels: Dict[float, int], buckets: Dict[float, List[int]], per_unit: float,
+                 to_tick: Callable[[float, float], int]) -> Tuple[Dict[int, int], Dict[int, List[int]]]:
+    """Re-key float price levels by integer tick count (via to_tick), merging levels on the same tick."""
+    tick_levels = {}
+    tick_buckets = {}
+    for p, q in levels.items():
+        t = to_tick(p, per_unit)
+        if t in tick_levels:
+            tick_levels[t] += q
+            tick_buckets[t] += buckets[p]
+        else:
+            tick_levels[t] = q
+            tick_buckets[t] = buckets[p]
+    return tick_levels, tick_buckets
 
-    fills = []
-    traded = 0
-    bid_idx = 0
-    ask_idx = 0
 
-    # Convert to mutable for partial fills
-    bid_rem = [b["qty"] for b in valid_bids]
-    ask_rem = [a["qty"] for a in valid_asks]
+def _volume_peak(demand: List[int], supply: List[int]) -> Tuple[int, int, int]:
+    """
+    Locate the maximum of min(demand, supply) and its tie band.
+
+    demand is non-increasing and supply non-decreasing, so the volume curve is
+    unimodal: binary-search the crossing, then widen over equal volumes only.
+
+    Returns:
+        (best_volume, lo, hi) with the winning band at indices lo..hi inclusive.
+    """
+    n = len(demand)
+
+    # First index where demand drops below supply
+    left, right = 0, n
+    while left < right:
+        mid = (left + right) // 2
+        if demand[mid] < supply[mid]:
+            right = mid
+        else:
+            left = mid + 1
+
+    # Peak is just before the crossing (volume = supply) or at it (volume = demand)
+    best_volume = -1
+    peak = 0
+    for i in (left - 1, left):
+        if 0 <= i < n:
+            volume = min(demand[i], supply[i])
+            if volume > best_volume:
+                best_volume = volume
+                peak = i
+
+    if best_volume <= 0:
+        return 0, peak, peak
+
+    lo = hi = peak
+    while lo > 0 and min(demand[lo - 1], supply[lo - 1]) == best_volume:
+        lo -= 1
+    while hi < n - 1 and min(demand[hi + 1], supply[hi + 1]) == best_volume:
+        hi += 1
+
+    return best_volume, lo, hi
+
+
+def _allocate_fills(orders: OrderBatch, candidates: List[int], bid_rows: Dict[int, List[int]],
+                    ask_rows: Dict[int, List[int]], clearing_tick: int, clearing_price: float,
+                    target_vol: int) -> List[dict]:
+    """
+    Allocate fills at uniform price, FIFO within each side (rows bucketed by tick level).
+
+    Single pass: one cursor per side advances over priority-ordered rows and
+    fills are emitted directly; remaining quantities live in locals, so the
+    batch columns are never copied or mutated.
+    """
+    # candidates is already sorted ascending: bisect for the marketable cutoffs
+    # instead of filtering and re-sorting the level keys; best price first
+    bid_iter = _priority_rows(orders, bid_rows, reversed(candidates[bisect_left(candidates, clearing_tick):]))
+    ask_iter = _priority_rows(orders, ask_rows, candidates[:bisect_right(candidates, clearing_tick)])
+
+    order_id = orders.order_id
+    qty = orders.qty
 
-    while traded < target_vol and bid_idx < len(valid_bids) and ask_idx < len(valid_asks):
-        if bid_rem[bid_idx] == 0:
-            bid_idx += 1
+    fills = []
+    add_fill = fills.append
+    traded = 0
+    bid = ask = None
+    bid_rem = ask_rem = 0
+
+    while traded < target_vol:
+        if bid_rem == 0:
+            bid = next(bid_iter, None)
+            if bid is None:
+                break
+            bid_rem = qty[bid]
             continue
-        if ask_rem[ask_idx] == 0:
-            ask_idx += 1
+        if ask_rem == 0:
+            ask = next(ask_iter, None)
+            if ask is None:
+                break
+            ask_rem = qty[ask]
             continue
 
-        qty = min(bid_rem[bid_idx], ask_rem[ask_idx], target_vol - traded)
-        fills.append({
-            "buyer_id": valid_bids[bid_idx]["order_id"],
-            "seller_id": valid_asks[ask_idx]["order_id"],
-            "price": price,
-            "qty": qty,
+        fill_qty = min(bid_rem, ask_rem, target_vol - traded)
+        add_fill({
+            "buyer_id": order_id[bid],
+            "seller_id": order_id[ask],
+            "price": clearing_price,
+            "qty": fill_qty,
             "taker_side": "BUY",  # Batch convention: consistent taker_side
         })
-        bid_rem[bid_idx] -= qty
-        ask_rem[ask_idx] -= qty
-        traded += qty
+        bid_rem -= fill_qty
+        ask_rem -= fill_qty
+        traded += fill_qty
 
     return fills
 
+
+def _priority_rows(orders: OrderBatch, rows_by_price: Dict[int, List[int]],
+                   prices: Iterable[int]) -> Iterator[int]:
+    """
+    Yield rows level by level in the given price order, FIFO (timestamp, order_id) within a level.
+
+    Prices with no bucket on this side are skipped. Levels are ordered lazily,
+    so levels beyond the traded volume are never touched.
+    """
+    timestamp = orders.timestamp
+    order_id = orders.order_id
+
+    for p in prices:
+        level = rows_by_price.get(p)
+        if level is None:
+            continue
+        if len(level) > 1:
+            # Rows are bucketed in arrival order, so a level is usually FIFO
+            # already: verify strictly increasing timestamps with a C-level
+            # pairwise compare and only fall back to the keyed sort if not
+            times = list(map(timestamp.__getitem__, level))
+            if not all(map(lt, times, islice(times, 1, None))):
+                level.sort(key=lambda i: (timestamp[i], order_id[i]))
+        yield from level
@@ -4,14 +4,15 @@ import time
 import json
 import platform
 import sys
-from typing import List
+from array import array
 
 
 class Benchmark:
     """Track per-order latency and compute percentiles."""
 
     def __init__(self):
-        self.latencies_us: List[float] = []
+        # float32 buffer: 4 bytes per sample instead of a boxed Python float
+        self.latencies_us = array("f")
         self.start_time = None
         self.end_time = None
 
@@ -23,6 +24,10 @@ class Benchmark:
         """Record single order latency in microseconds."""
         self.latencies_us.append(latency_sec * 1e6)
 
+    def record_bulk(self, latency_sec: float, count: int):
+        """Record the same per-order latency for count orders in one call."""
+        self.latencies_us.extend(array("f", [latency_sec * 1e6]) * count)
+
     def stop(self):
         """Stop overall benchmark."""
         self.end_time = time.perf_counter()
@@ -46,10 +51,11 @@ class Benchmark:
         orders_processed = len(self.latencies_us)
         orders_per_sec = orders_processed / elapsed if elapsed > 0 else 0
 
+        # One sort shared by all three percentile lookups
         sorted_lat = sorted(self.latencies_us)
-        p50 = sorted_lat[int(len(sorted_lat) * 0.50)]
-        p95 = sorted_lat[int(len(sorted_lat) * 0.95)]
-        p99 = sorted_lat[int(len(sorted_lat) * 0.99)]
+        p50 = sorted_lat[int(orders_processed * 0.50)]
+        p95 = sorted_lat[int(orders_processed * 0.95)]
+        p99 = sorted_lat[int(orders_processed * 0.99)]
 
         return {
             "orders_processed": orders_processed,
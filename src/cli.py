@@ -5,35 +5,50 @@ import csv
 import sys
 import os
 import time
-from typing import List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, Iterator, List
 
 from src.engine import OrderBook
 from src.auction import clear_batch
+from src.orders import OrderBatch, load_orders, BUY, SELL, LIMIT, IOC
 from src.gen import generate_orders
 from src.bench import Benchmark
 from src.metrics import load_trades, load_quotes, compute_vwap, compare_modes
 from typing import Tuple, Optional
 
+# Output file buffer size for streamed CSV writes
+WRITE_BUFFER = 1 << 20
 
-def _pre_auction_snapshot(batch_orders: List[dict]) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+# Output columns; trade rows are projected from fill dicts in C via itemgetter
+TRADE_FIELDS = ["buyer_id", "seller_id", "price", "qty", "taker_side"]
+QUOTE_FIELDS = ["bid", "ask"]
+_trade_row = itemgetter(*TRADE_FIELDS)
+
+
+def _pre_auction_snapshot(batch_orders: OrderBatch) -> Tuple[Optional[float], Optional[float], Optional[float]]:
     """
     Compute pre-auction best bid/ask/mid from batch orders.
     
     Returns:
         (best_bid, best_ask, pre_mid) or (None, None, None) if insufficient data.
     """
-    bid_prices = []
-    ask_prices = []
-    
-    for o in batch_orders:
-        if o["type"] in ["LIMIT", "IOC"] and o.get("price") is not None:
-            if o["side"] == "BUY":
-                bid_prices.append(o["price"])
-            elif o["side"] == "SELL":
-                ask_prices.append(o["price"])
-    
-    best_bid = max(bid_prices) if bid_prices else None
-    best_ask = min(ask_prices) if ask_prices else None
+    otype = batch_orders.otype
+    side = batch_orders.side
+    price = batch_orders.price
+
+    # Masked reductions over the columns: LIMIT/IOC rows with a
+    # price on each side; `p == p` masks out NaN (absent) prices
+    best_bid = max(
+        [p for t, s, p in zip(otype, side, price) if s == BUY and (t == LIMIT or t == IOC) and p == p],
+        default=None,
+    )
+    best_ask = min(
+        [p for t, s, p in zip(otype, side, price) if s == SELL and (t == LIMIT or t == IOC) and p == p],
+        default=None,
+    )
     
     if best_bid is not None and best_ask is not None:
         pre_mid = (best_bid + best_ask) / 2.0
@@ -43,6 +58,23 @@ def _pre_auction_snapshot(batch_orders: List[dict]) -> Tuple[Optional[float], Op
     return best_bid, best_ask, pre_mid
 
 
+def _batch_rows(orders: OrderBatch, interval_ms: int) -> Iterator[List[int]]:
+    """Yield row indices per auction interval, in interval order (arrival order within each)."""
+    # Stable sort of rows by interval id (linear for time-ordered input), then split on changes
+    width = interval_ms * 1_000_000
+    batch_ids = [ts // width for ts in orders.timestamp]
+    rows = sorted(range(len(batch_ids)), key=batch_ids.__getitem__)
+    for _, group in groupby(rows, key=batch_ids.__getitem__):
+        yield list(group)
+
+
+def _clear_one(batch_orders: OrderBatch) -> Tuple[Optional[float], Optional[float], List[dict]]:
+    """Snapshot and clear one batch; module-level so worker processes can run it."""
+    best_bid, best_ask, pre_mid = _pre_auction_snapshot(batch_orders)
+    clearing_price, fills = clear_batch(batch_orders, pre_mid=pre_mid, tick=0.01)
+    return best_bid, best_ask, fills
+
+
 def cmd_gen(args):
     """Generate orders CSV."""
     generate_orders(
@@ -51,65 +83,25 @@ def cmd_gen(args):
         auction_interval_ms=args.auction_ms,
         cross_rate=args.cross_rate,
         output=sys.stdout,
+        fast=args.fast,
     )
 
 
 def cmd_simulate(args):
     """Run simulation in batch or continuous mode."""
-    # Read orders
-    orders = []
-    with open(args.input, "r") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            order = {
-                "timestamp": int(row["timestamp"]),
-                "order_id": int(row["order_id"]),
-                "type": row["type"],
-                "side": row["side"],
-                "qty": int(row["qty"]) if row["qty"] else 0,
-            }
-            if row["price"]:
-                order["price"] = float(row["price"])
-            else:
-                order["price"] = None
-
-            # For CANCEL, the price field contains the target order_id
-            if order["type"] == "CANCEL":
-                order["cancel_id"] = int(row["price"])
-
-            orders.append(order)
+    orders = load_orders(args.input)
 
     os.makedirs(args.out, exist_ok=True)
 
     if args.mode == "batch":
-        _simulate_batch(orders, args.interval, args.out)
+        _simulate_batch(orders, args.interval, args.out, args.workers)
     else:
         _simulate_continuous(orders, args.out)
 
 
 def cmd_benchmark(args):
     """Run benchmark with timing."""
-    # Read orders
-    orders = []
-    with open(args.input, "r") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            order = {
-                "timestamp": int(row["timestamp"]),
-                "order_id": int(row["order_id"]),
-                "type": row["type"],
-                "side": row["side"],
-                "qty": int(row["qty"]) if row["qty"] else 0,
-            }
-            if row["price"]:
-                order["price"] = float(row["price"])
-            else:
-                order["price"] = None
-
-            if order["type"] == "CANCEL":
-                order["cancel_id"] = int(row["price"])
-
-            orders.append(order)
+    orders = load_orders(args.input)
 
     os.makedirs(args.out, exist_ok=True)
 
@@ -129,31 +121,11 @@ def cmd_benchmark(args):
 
 def cmd_compare(args):
     """Compare batch vs continuous modes."""
-    # Read orders
-    orders = []
-    with open(args.input, "r") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            order = {
-                "timestamp": int(row["timestamp"]),
-                "order_id": int(row["order_id"]),
-                "type": row["type"],
-                "side": row["side"],
-                "qty": int(row["qty"]) if row["qty"] else 0,
-            }
-            if row["price"]:
-                order["price"] = float(row["price"])
-            else:
-                order["price"] = None
-
-            if order["type"] == "CANCEL":
-                order["cancel_id"] = int(row["price"])
-
-            orders.append(order)
+    orders = load_orders(args.input)
 
     # Run batch
     os.makedirs("out/batch", exist_ok=True)
-    _simulate_batch(orders, args.interval, "out/batch")
+    _simulate_batch(orders, args.interval, "out/batch", args.workers)
 
     # Run continuous
     os.makedirs("out/continuous", exist_ok=True)
@@ -194,130 +166,143 @@ def cmd_metrics(args):
     print(f"Metrics written to {path}")
 
 
-def _simulate_batch(orders: List[dict], interval_ms: int, out_dir: str):
-    """Simulate batch auction mode."""
-    # Group orders by interval
-    batches = {}
-    for o in orders:
-        batch_id = o["timestamp"] // (interval_ms * 1_000_000)
-        if batch_id not in batches:
-            batches[batch_id] = []
-        batches[batch_id].append(o)
-
-    all_trades = []
-    all_quotes = []
-
-    for batch_id in sorted(batches.keys()):
-        batch_orders = batches[batch_id]
-        
-        # Compute pre-auction snapshot
-        best_bid, best_ask, pre_mid = _pre_auction_snapshot(batch_orders)
-        
-        # Clear batch with computed pre_mid
-        clearing_price, fills = clear_batch(batch_orders, pre_mid=pre_mid, tick=0.01)
-
-        # Log pre-auction quote (not clearing price)
-        if best_bid is not None and best_ask is not None:
-            all_quotes.append({"bid": best_bid, "ask": best_ask})
-        
-        all_trades.extend(fills)
+def _simulate_batch(orders: OrderBatch, interval_ms: int, out_dir: str, workers: int = 1):
+    """
+    Simulate batch auction mode.
 
-    # Write trades
-    with open(os.path.join(out_dir, "trades.csv"), "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["buyer_id", "seller_id", "price", "qty", "taker_side"])
-        writer.writeheader()
-        writer.writerows(all_trades)
+    Batches share no state, so with workers > 1 they are cleared in a process
+    pool; results come back in interval order, so output is identical.
+    """
+    batches = (orders.take(rows) for rows in _batch_rows(orders, interval_ms))
 
-    # Write quotes
-    with open(os.path.join(out_dir, "quotes.csv"), "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["bid", "ask"])
-        writer.writeheader()
-        writer.writerows(all_quotes)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            n_trades = _write_batch_results(_pool_map(pool, _clear_one, batches, workers * 2), out_dir)
+    else:
+        n_trades = _write_batch_results(map(_clear_one, batches), out_dir)
+
+    print(f"Batch simulation complete. {n_trades} trades.")
+
+
+def _pool_map(pool: ProcessPoolExecutor, fn, items: Iterable, window: int) -> Iterator:
+    """
+    Like pool.map(fn, items), but with at most window tasks in flight.
+
+    pool.map submits every item up front, which would build and pickle every
+    batch at once; here the next batch is only taken once the oldest result
+    has been handed back, so memory stays bounded as in the serial path.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _write_batch_results(results: Iterator[Tuple[Optional[float], Optional[float], List[dict]]],
+                         out_dir: str) -> int:
+    """Stream each batch's fills and pre-auction quote to disk; returns the trade count."""
+    n_trades = 0
+
+    with open(os.path.join(out_dir, "trades.csv"), "w", buffering=WRITE_BUFFER) as tf, \
+            open(os.path.join(out_dir, "quotes.csv"), "w", buffering=WRITE_BUFFER) as qf:
+        trade_writer = csv.writer(tf)
+        trade_writer.writerow(TRADE_FIELDS)
+        quote_writer = csv.writer(qf)
+        quote_writer.writerow(QUOTE_FIELDS)
+
+        for best_bid, best_ask, fills in results:
+            # Log pre-auction quote (not clearing price)
+            if best_bid is not None and best_ask is not None:
+                quote_writer.writerow((best_bid, best_ask))
+
+            trade_writer.writerows(map(_trade_row, fills))
+            n_trades += len(fills)
 
-    print(f"Batch simulation complete. {len(all_trades)} trades.")
+    return n_trades
 
 
-def _simulate_continuous(orders: List[dict], out_dir: str):
+def _simulate_continuous(orders: OrderBatch, out_dir: str):
     """Simulate continuous matching mode."""
-    book = OrderBook()
+    # Quotes stream to the CSV a ring at a time, so they never pile up in memory
+    with open(os.path.join(out_dir, "quotes.csv"), "w", buffering=WRITE_BUFFER) as qf:
+        quote_writer = csv.writer(qf)
+        quote_writer.writerow(QUOTE_FIELDS)
+        book = OrderBook(quote_sink=quote_writer.writerows)
+
+        # Bind per-order lookups to locals
+        add_order = book.add_order
+        cancel_order = book.cancel_order
+        log_quote = book.log_quote
+
+        for order_id, side, order_type, price, qty, cancel_id in orders.iter_decoded():
+            if order_type == "CANCEL":
+                cancel_order(cancel_id)
+            else:
+                add_order(order_id, side, price, qty, order_type)
 
-    for o in orders:
-        if o["type"] == "CANCEL":
-            book.cancel_order(o["cancel_id"])
-        else:
-            book.add_order(o["order_id"], o["side"], o["price"], o["qty"], o["type"])
+            # Snapshot quote
+            log_quote()
 
-        # Snapshot quote
-        snap = book.snapshot()
-        book.quotes.append(snap)
+        book.flush_quotes()
 
     # Write trades
     with open(os.path.join(out_dir, "trades.csv"), "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["buyer_id", "seller_id", "price", "qty", "taker_side"])
-        writer.writeheader()
-        writer.writerows(book.trades)
+        writer = csv.writer(f)
+        writer.writerow(TRADE_FIELDS)
+        writer.writerows(book.trade_rows())
 
-    # Write quotes
-    with open(os.path.join(out_dir, "quotes.csv"), "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["bid", "ask"])
-        writer.writeheader()
-        writer.writerows(book.quotes)
+    print(f"Continuous simulation complete. {book.trade_count} trades.")
 
-    print(f"Continuous simulation complete. {len(book.trades)} trades.")
 
-
-def _benchmark_batch(orders: List[dict], interval_ms: int, out_dir: str, bench: Benchmark):
+def _benchmark_batch(orders: OrderBatch, interval_ms: int, out_dir: str, bench: Benchmark):
     """Benchmark batch mode."""
-    batches = {}
-    for o in orders:
-        batch_id = o["timestamp"] // (interval_ms * 1_000_000)
-        if batch_id not in batches:
-            batches[batch_id] = []
-        batches[batch_id].append(o)
-
-    all_trades = []
-
-    for batch_id in sorted(batches.keys()):
-        batch_orders = batches[batch_id]
-        
-        # Compute pre-auction snapshot
-        best_bid, best_ask, pre_mid = _pre_auction_snapshot(batch_orders)
-        
-        t0 = time.perf_counter()
-        clearing_price, fills = clear_batch(batch_orders, pre_mid=pre_mid, tick=0.01)
-        t1 = time.perf_counter()
-
-        for _ in batch_orders:
-            bench.record((t1 - t0) / len(batch_orders))
-
-        all_trades.extend(fills)
+    with open(os.path.join(out_dir, "trades.csv"), "w", buffering=WRITE_BUFFER) as f:
+        writer = csv.writer(f)
+        writer.writerow(TRADE_FIELDS)
 
-    # Write trades
-    with open(os.path.join(out_dir, "trades.csv"), "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["buyer_id", "seller_id", "price", "qty", "taker_side"])
-        writer.writeheader()
-        writer.writerows(all_trades)
+        for rows in _batch_rows(orders, interval_ms):
+            batch_orders = orders.take(rows)
 
+            # Compute pre-auction snapshot
+            best_bid, best_ask, pre_mid = _pre_auction_snapshot(batch_orders)
 
-def _benchmark_continuous(orders: List[dict], out_dir: str, bench: Benchmark):
+            t0 = time.perf_counter()
+            clearing_price, fills = clear_batch(batch_orders, pre_mid=pre_mid, tick=0.01)
+            t1 = time.perf_counter()
+
+            bench.record_bulk((t1 - t0) / len(batch_orders), len(batch_orders))
+
+            writer.writerows(map(_trade_row, fills))
+
+
+def _benchmark_continuous(orders: OrderBatch, out_dir: str, bench: Benchmark):
     """Benchmark continuous mode."""
     book = OrderBook()
 
-    for o in orders:
-        t0 = time.perf_counter()
-        if o["type"] == "CANCEL":
-            book.cancel_order(o["cancel_id"])
+    # Bind hot-loop lookups to locals so the timed region is just the book call
+    perf_counter = time.perf_counter
+    add_order = book.add_order
+    cancel_order = book.cancel_order
+    record = bench.record
+
+    for order_id, side, order_type, price, qty, cancel_id in orders.iter_decoded():
+        t0 = perf_counter()
+        if order_type == "CANCEL":
+            cancel_order(cancel_id)
         else:
-            book.add_order(o["order_id"], o["side"], o["price"], o["qty"], o["type"])
-        t1 = time.perf_counter()
+            add_order(order_id, side, price, qty, order_type)
+        t1 = perf_counter()
 
-        bench.record(t1 - t0)
+        record(t1 - t0)
 
     # Write trades
     with open(os.path.join(out_dir, "trades.csv"), "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["buyer_id", "seller_id", "price", "qty", "taker_side"])
-        writer.writeheader()
-        writer.writerows(book.trades)
+        writer = csv.writer(f)
+        writer.writerow(TRADE_FIELDS)
+        writer.writerows(book.trade_rows())
 
 
 def main():
@@ -331,6 +316,7 @@ def main():
     gen_parser.add_argument("--seed", type=int, required=True, help="Random seed")
     gen_parser.add_argument("--auction_ms", type=int, required=True, help="Auction interval (ms)")
     gen_parser.add_argument("--cross_rate", type=float, required=True, help="Cross rate (0.0-1.0)")
+    gen_parser.add_argument("--fast", action="store_true", help="Prefetched RNG draws (faster, different stream)")
     gen_parser.set_defaults(func=cmd_gen)
 
     # simulate
@@ -339,6 +325,7 @@ def main():
     sim_parser.add_argument("--mode", choices=["batch", "continuous"], required=True)
     sim_parser.add_argument("--interval", type=int, help="Batch interval (ms)")
     sim_parser.add_argument("--out", required=True, help="Output directory")
+    sim_parser.add_argument("--workers", type=int, default=1, help="Processes for batch clearing (default 1)")
     sim_parser.set_defaults(func=cmd_simulate)
 
     # benchmark
@@ -353,6 +340,7 @@ def main():
     cmp_parser = subparsers.add_parser("compare", help="Compare batch vs continuous")
     cmp_parser.add_argument("--in", dest="input", required=True, help="Input CSV")
     cmp_parser.add_argument("--interval", type=int, required=True, help="Batch interval (ms)")
+    cmp_parser.add_argument("--workers", type=int, default=1, help="Processes for batch clearing (default 1)")
     cmp_parser.set_defaults(func=cmd_compare)
 
     # metrics
@@ -1,302 +1,344 @@
 """Continuous order book engine with price-time priority."""
 
 import heapq
+import math
+from array import array
 from collections import deque
-from typing import Dict, List, Tuple, Optional
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
+
+from src.orders import bid_tick, ask_tick
+
+# taker_side names indexed by the trade log's taker_is_buy flag
+_TAKER_SIDE = ("SELL", "BUY")
+
+# Quotes held by the quote ring before it is handed to the sink (or wraps)
+QUOTE_RING = 1 << 16
+
+
+class Order:
+    """Resting order node, shared by its level deque and id_index."""
+
+    __slots__ = ("oid", "qty", "alive")
+
+    def __init__(self, oid: int, qty: int):
+        self.oid = oid
+        self.qty = qty
+        self.alive = True
+
+
+class _Fills(Sequence):
+    """Read-only view of a run of trade log entries; each item is built as a fill dict on access.
+
+    Compares equal to (and prints like) the list of those fill dicts; unhashable, like a list.
+    """
+
+    __slots__ = ("_book", "_start", "_end")
+
+    def __init__(self, book: "OrderBook", start: int, end: int):
+        self._book = book
+        self._start = start
+        self._end = end
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("fill index out of range")
+        return self._book._fill(self._start + i)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(list(self))
 
 
 class OrderBook:
-    """Price-time priority LOB: dict-of-deque per level + heaps for best prices."""
-
-    def __init__(self):
-        # {price: deque of orders} for bids/asks
-        self.bids: Dict[float, deque] = {}
-        self.asks: Dict[float, deque] = {}
-        # Min-heap for asks (low prices first), max-heap for bids (negate prices)
-        self.bid_heap: List[float] = []
-        self.ask_heap: List[float] = []
-        # id -> (side, price, qty) for CANCEL lookups
-        self.id_index: Dict[int, Tuple[str, float, int]] = {}
-        # Logs
-        self.trades: List[dict] = []
-        self.quotes: List[dict] = []
+    """Price-time priority LOB: dict-of-deque per level + heaps for best prices.
+
+    Levels are keyed by integer tick count (see tick_key()); prices are converted
+    back to floats only where they leave the book, in fills and snapshot(). Off-grid
+    limits snap inward (bids down, asks up), so no order trades through its limit.
+    """
+
+    def __init__(self, tick_size: float = 0.01, quote_sink: Optional[Callable[[Iterable[tuple]], object]] = None):
+        self.tick_size = tick_size
+        # Ticks per unit price; tick t is the price t / _per_unit
+        self._per_unit = 1.0 / tick_size
+        # Per side, input price -> tick memo; order flow reuses a narrow band of
+        # prices, and a dict hit is cheaper than the floor/ceil conversion
+        self._ticks: Dict[str, Dict[float, int]] = {"BUY": {}, "SELL": {}}
+        # {tick: deque of Order nodes} for bids/asks
+        self.bids: Dict[int, deque] = {}
+        self.asks: Dict[int, deque] = {}
+        # Min-heap for asks (low ticks first), max-heap for bids (negate ticks)
+        self.bid_heap: List[int] = []
+        self.ask_heap: List[int] = []
+        # id -> the order's Order node, shared with its level deque
+        self.id_index: Dict[int, Order] = {}
+        # Taker side -> (levels, heap, heap key sign) it matches against
+        self._opposite = {
+            "BUY": (self.asks, self.ask_heap, 1),
+            "SELL": (self.bids, self.bid_heap, -1),
+        }
+        # Trade log, one column per field (see trades / trade_rows() for row views)
+        self.trade_buyer_id = array("q")
+        self.trade_seller_id = array("q")
+        self.trade_price = array("d")
+        self.trade_qty = array("q")
+        self.trade_taker_is_buy = bytearray()
+        self._trade_log_append = (
+            self.trade_buyer_id.append, self.trade_seller_id.append, self.trade_price.append,
+            self.trade_qty.append, self.trade_taker_is_buy.append,
+        )
+        # Fill dicts materialized so far by the trades property
+        self._trade_dicts: List[dict] = []
+        # Shared result for orders that do not trade (views are read-only)
+        self._no_fills = _Fills(self, 0, 0)
+        # Quote ring filled by log_quote(), one column per side. Each time it fills,
+        # its (bid, ask) rows go to quote_sink (e.g. csv writer.writerows); with no
+        # sink it wraps and only the latest QUOTE_RING quotes are kept
+        self.quote_sink = quote_sink
+        # Allocated by the first log_quote(), so books that never log quotes stay small
+        self._quote_bid: List[Optional[float]] = []
+        self._quote_ask: List[Optional[float]] = []
+        self._quote_cursor = 0
+        self._quote_wrapped = False
 
     def add_order(self, order_id: int, side: str, price: Optional[float], qty: int, order_type: str):
-        """Add LIMIT or MARKET order; return fill if any."""
+        """Add LIMIT or MARKET order; return its fills (a read-only sequence of fill dicts)."""
+        start = len(self.trade_qty)
         if order_type == "MARKET":
             # Execute immediately at best available prices
-            fills = self._execute_market(order_id, side, qty)
-            return fills
-        elif order_type == "IOC":
-            # Immediate-or-cancel: match what you can, cancel rest
-            fills = self._execute_ioc(order_id, side, price, qty)
-            return fills
+            self._execute_market(order_id, side, qty)
         else:
-            # LIMIT: try to match, rest goes to book
-            fills = self._match_limit(order_id, side, price, qty)
-            return fills
+            ticks = self._ticks[side]
+            tick = ticks.get(price)
+            if tick is None:
+                tick = ticks[price] = self.tick_key(price, side)
+            if order_type == "IOC":
+                # Immediate-or-cancel: match what you can, cancel rest
+                self._execute_ioc(order_id, side, tick, qty)
+            else:
+                # LIMIT: try to match, rest goes to book
+                self._match_limit(order_id, side, tick, qty)
 
-    def cancel_order(self, order_id: int) -> bool:
-        """Cancel by id; return True if found and removed."""
-        if order_id not in self.id_index:
-            return False
+        end = len(self.trade_qty)
+        return _Fills(self, start, end) if end > start else self._no_fills
 
-        side, price, qty = self.id_index.pop(order_id)
-        levels = self.bids if side == "BUY" else self.asks
+    def cancel_order(self, order_id: int) -> bool:
+        """Cancel by id; return True if found and removed.
 
-        if price not in levels:
+        O(1): the order's node is only flagged dead. Matching and snapshot()
+        drop dead nodes (and levels left empty) when they reach them.
+        """
+        node = self.id_index.pop(order_id, None)
+        if node is None:
             return False
 
-        # Remove from deque
-        level = levels[price]
-        new_level = deque()
-        found = False
-        for oid, q in level:
-            if oid == order_id:
-                found = True
-            else:
-                new_level.append((oid, q))
-
-        if not new_level:
-            del levels[price]
-            self._rebuild_heaps()
-        else:
-            levels[price] = new_level
-
-        return found
+        node.alive = False
+        return True
 
-    def _match_limit(self, order_id: int, side: str, price: float, qty: int) -> List[dict]:
+    def tick_key(self, price: float, side: str) -> int:
+        """Level key (integer tick count) for a limit price on the given side."""
+        if side == "BUY":
+            return bid_tick(price, self._per_unit)
+        return ask_tick(price, self._per_unit)
+
+    @property
+    def trades(self) -> List[dict]:
+        """Trade log as fill dicts.
+
+        Dicts are built from the columns on demand and kept, so each access only
+        converts fills logged since the last one. The list is a view of the log:
+        changes to it are not seen by trade_rows() or trade_count.
+        """
+        trade_dicts = self._trade_dicts
+        n = len(self.trade_qty)
+        if len(trade_dicts) < n:
+            trade_dicts.extend(_Fills(self, len(trade_dicts), n))
+        return trade_dicts
+
+    @property
+    def trade_count(self) -> int:
+        """Number of fills logged."""
+        return len(self.trade_qty)
+
+    def trade_rows(self) -> Iterator[Tuple[int, int, float, int, str]]:
+        """Iterate the trade log as (buyer_id, seller_id, price, qty, taker_side) tuples."""
+        return zip(
+            self.trade_buyer_id, self.trade_seller_id, self.trade_price, self.trade_qty,
+            map(_TAKER_SIDE.__getitem__, self.trade_taker_is_buy),
+        )
+
+    @property
+    def quotes(self) -> List[dict]:
+        """Quotes still held in the ring, oldest first, as {"bid", "ask"} dicts.
+
+        A fresh list on each access: log_quote() is the only way to record a
+        quote, and appending to this list does not.
+        """
+        return [{"bid": bid, "ask": ask} for bid, ask in self._held_quotes()]
+
+    @quotes.setter
+    def quotes(self, value):
+        raise AttributeError("quotes is read-only; record quotes with log_quote()")
+
+    def log_quote(self):
+        """Record the current best bid/ask (as snapshot() reports them) in the quote ring."""
+        i = self._quote_cursor
+        if i == 0 and not self._quote_bid:
+            self._quote_bid = [None] * QUOTE_RING
+            self._quote_ask = [None] * QUOTE_RING
+        self._quote_bid[i] = self._best_price(self.bids, self.bid_heap, -1)
+        self._quote_ask[i] = self._best_price(self.asks, self.ask_heap, 1)
+        i += 1
+        if i == QUOTE_RING:
+            i = 0
+            if self.quote_sink is not None:
+                self.quote_sink(zip(self._quote_bid, self._quote_ask))
+            else:
+                self._quote_wrapped = True
+        self._quote_cursor = i
+
+    def flush_quotes(self):
+        """Hand the quotes still held in the ring to quote_sink and empty it."""
+        if self.quote_sink is not None:
+            self.quote_sink(self._held_quotes())
+        self._quote_cursor = 0
+        self._quote_wrapped = False
+
+    def _held_quotes(self) -> Iterator[Tuple[Optional[float], Optional[float]]]:
+        """(bid, ask) rows held in the ring, oldest first."""
+        i = self._quote_cursor
+        if self._quote_wrapped:
+            return zip(self._quote_bid[i:] + self._quote_bid[:i], self._quote_ask[i:] + self._quote_ask[:i])
+        return zip(self._quote_bid[:i], self._quote_ask[:i])
+
+    def _fill(self, i: int) -> dict:
+        """Trade log entry i as a fill dict."""
+        return {
+            "buyer_id": self.trade_buyer_id[i],
+            "seller_id": self.trade_seller_id[i],
+            "price": self.trade_price[i],
+            "qty": self.trade_qty[i],
+            "taker_side": _TAKER_SIDE[self.trade_taker_is_buy[i]],
+        }
+
+    def _match_limit(self, order_id: int, side: str, tick: int, qty: int):
         """Match aggressively, rest rests on book."""
-        fills = []
-        remaining = qty
+        remaining = self._match_side(order_id, side, tick, qty)
 
-        if side == "BUY":
-            # Match against asks
-            while remaining > 0 and self.ask_heap:
-                best_ask = self.ask_heap[0]
-                if best_ask > price:
-                    break
-                level = self.asks[best_ask]
-                while level and remaining > 0:
-                    ask_id, ask_qty = level[0]
-                    trade_qty = min(remaining, ask_qty)
-                    fills.append({
-                        "buyer_id": order_id,
-                        "seller_id": ask_id,
-                        "price": best_ask,
-                        "qty": trade_qty,
-                        "taker_side": "BUY",
-                    })
-                    remaining -= trade_qty
-                    ask_qty -= trade_qty
-                    if ask_qty == 0:
-                        level.popleft()
-                        del self.id_index[ask_id]
-                    else:
-                        level[0] = (ask_id, ask_qty)
-                        self.id_index[ask_id] = ("SELL", best_ask, ask_qty)
-                        break
-
-                if not level:
-                    del self.asks[best_ask]
-                    heapq.heappop(self.ask_heap)
-
-            # Place remainder on book
-            if remaining > 0:
-                if price not in self.bids:
-                    self.bids[price] = deque()
-                    heapq.heappush(self.bid_heap, -price)
-                self.bids[price].append((order_id, remaining))
-                self.id_index[order_id] = ("BUY", price, remaining)
-
-        else:  # SELL
-            # Match against bids
-            while remaining > 0 and self.bid_heap:
-                best_bid = -self.bid_heap[0]
-                if best_bid < price:
-                    break
-                level = self.bids[best_bid]
-                while level and remaining > 0:
-                    bid_id, bid_qty = level[0]
-                    trade_qty = min(remaining, bid_qty)
-                    fills.append({
-                        "buyer_id": bid_id,
-                        "seller_id": order_id,
-                        "price": best_bid,
-                        "qty": trade_qty,
-                        "taker_side": "SELL",
-                    })
-                    remaining -= trade_qty
-                    bid_qty -= trade_qty
-                    if bid_qty == 0:
-                        level.popleft()
-                        del self.id_index[bid_id]
-                    else:
-                        level[0] = (bid_id, bid_qty)
-                        self.id_index[bid_id] = ("BUY", best_bid, bid_qty)
-                        break
-
-                if not level:
-                    del self.bids[best_bid]
-                    heapq.heappop(self.bid_heap)
-
-            # Place remainder on book
-            if remaining > 0:
-                if price not in self.asks:
-                    self.asks[price] = deque()
-                    heapq.heappush(self.ask_heap, price)
-                self.asks[price].append((order_id, remaining))
-                self.id_index[order_id] = ("SELL", price, remaining)
-
-        for fill in fills:
-            self.trades.append(fill)
-
-        return fills
-
-    def _execute_market(self, order_id: int, side: str, qty: int) -> List[dict]:
+        # Place remainder on book
+        if remaining > 0:
+            if side == "BUY":
+                levels, heap, key = self.bids, self.bid_heap, -tick
+            else:
+                levels, heap, key = self.asks, self.ask_heap, tick
+            if tick not in levels:
+                levels[tick] = deque()
+                heapq.heappush(heap, key)
+            node = Order(order_id, remaining)
+            levels[tick].append(node)
+            self.id_index[order_id] = node
+
+    def _execute_market(self, order_id: int, side: str, qty: int):
         """Execute MARKET order at best available prices."""
-        fills = []
-        remaining = qty
+        self._match_side(order_id, side, None, qty)
 
-        if side == "BUY":
-            while remaining > 0 and self.ask_heap:
-                best_ask = self.ask_heap[0]
-                level = self.asks[best_ask]
-                while level and remaining > 0:
-                    ask_id, ask_qty = level[0]
-                    trade_qty = min(remaining, ask_qty)
-                    fills.append({
-                        "buyer_id": order_id,
-                        "seller_id": ask_id,
-                        "price": best_ask,
-                        "qty": trade_qty,
-                        "taker_side": "BUY",
-                    })
-                    remaining -= trade_qty
-                    ask_qty -= trade_qty
-                    if ask_qty == 0:
-                        level.popleft()
-                        del self.id_index[ask_id]
-                    else:
-                        level[0] = (ask_id, ask_qty)
-                        self.id_index[ask_id] = ("SELL", best_ask, ask_qty)
-                        break
-
-                if not level:
-                    del self.asks[best_ask]
-                    heapq.heappop(self.ask_heap)
-        else:  # SELL
-            while remaining > 0 and self.bid_heap:
-                best_bid = -self.bid_heap[0]
-                level = self.bids[best_bid]
-                while level and remaining > 0:
-                    bid_id, bid_qty = level[0]
-                    trade_qty = min(remaining, bid_qty)
-                    fills.append({
-                        "buyer_id": bid_id,
-                        "seller_id": order_id,
-                        "price": best_bid,
-                        "qty": trade_qty,
-                        "taker_side": "SELL",
-                    })
-                    remaining -= trade_qty
-                    bid_qty -= trade_qty
-                    if bid_qty == 0:
-                        level.popleft()
-                        del self.id_index[bid_id]
-                    else:
-                        level[0] = (bid_id, bid_qty)
-                        self.id_index[bid_id] = ("BUY", best_bid, bid_qty)
-                        break
-
-                if not level:
-                    del self.bids[best_bid]
-                    heapq.heappop(self.bid_heap)
-
-        for fill in fills:
-            self.trades.append(fill)
-
-        return fills
-
-    def _execute_ioc(self, order_id: int, side: str, price: float, qty: int) -> List[dict]:
+    def _execute_ioc(self, order_id: int, side: str, tick: int, qty: int):
         """IOC: match what you can at limit price, cancel rest."""
-        fills = []
+        self._match_side(order_id, side, tick, qty)
+
+    def _match_side(self, order_id: int, side: str, limit: Optional[int], qty: int) -> int:
+        """
+        Sweep the opposite side best price first, FIFO within a level.
+
+        Shared by LIMIT, MARKET and IOC. Stops when qty is filled, the book side
+        is empty, or the best price is worse than limit (in ticks; None = no limit).
+        Logs fills to the trade columns and returns the unfilled quantity.
+        """
+        levels, heap, sign = self._opposite[side]
+        # Heap keys are sign * tick, so "worse than limit" is one comparison on either side
+        bound = math.inf if limit is None else sign * limit
         remaining = qty
-
-        if side == "BUY":
-            while remaining > 0 and self.ask_heap:
-                best_ask = self.ask_heap[0]
-                if best_ask > price:
-                    break
-                level = self.asks[best_ask]
-                while level and remaining > 0:
-                    ask_id, ask_qty = level[0]
-                    trade_qty = min(remaining, ask_qty)
-                    fills.append({
-                        "buyer_id": order_id,
-                        "seller_id": ask_id,
-                        "price": best_ask,
-                        "qty": trade_qty,
-                        "taker_side": "BUY",
-                    })
-                    remaining -= trade_qty
-                    ask_qty -= trade_qty
-                    if ask_qty == 0:
-                        level.popleft()
-                        del self.id_index[ask_id]
-                    else:
-                        level[0] = (ask_id, ask_qty)
-                        self.id_index[ask_id] = ("SELL", best_ask, ask_qty)
-                        break
-
-                if not level:
-                    del self.asks[best_ask]
-                    heapq.heappop(self.ask_heap)
-        else:  # SELL
-            while remaining > 0 and self.bid_heap:
-                best_bid = -self.bid_heap[0]
-                if best_bid < price:
+        if not heap or heap[0] > bound:
+            return remaining
+
+        # Bind everything the loop touches to locals; the taker fills the buyer
+        # column when buying and the seller column when selling, so pick once here
+        taker_is_buy = sign == 1
+        log_buyer, log_seller, log_price, log_qty, log_taker = self._trade_log_append
+        if taker_is_buy:
+            log_taker_id, log_maker_id = log_buyer, log_seller
+        else:
+            log_taker_id, log_maker_id = log_seller, log_buyer
+        id_index = self.id_index
+        heappop = heapq.heappop
+        per_unit = self._per_unit
+
+        while remaining > 0 and heap:
+            key = heap[0]
+            if key > bound:
+                break
+            best = sign * key
+            best_price = best / per_unit
+            level = levels[best]
+            popleft = level.popleft
+            while level and remaining > 0:
+                maker = level[0]
+                if not maker.alive:
+                    # Lazily cancelled: drop it on the way past
+                    popleft()
+                    continue
+                maker_id = maker.oid
+                maker_qty = maker.qty
+                trade_qty = remaining if remaining < maker_qty else maker_qty
+                log_taker_id(order_id)
+                log_maker_id(maker_id)
+                log_price(best_price)
+                log_qty(trade_qty)
+                log_taker(taker_is_buy)
+                remaining -= trade_qty
+                maker_qty -= trade_qty
+                if maker_qty == 0:
+                    popleft()
+                    del id_index[maker_id]
+                else:
+                    # Resting qty lives only in the node, which id_index shares
+                    maker.qty = maker_qty
                     break
-                level = self.bids[best_bid]
-                while level and remaining > 0:
-                    bid_id, bid_qty = level[0]
-                    trade_qty = min(remaining, bid_qty)
-                    fills.append({
-                        "buyer_id": bid_id,
-                        "seller_id": order_id,
-                        "price": best_bid,
-                        "qty": trade_qty,
-                        "taker_side": "SELL",
-                    })
-                    remaining -= trade_qty
-                    bid_qty -= trade_qty
-                    if bid_qty == 0:
-                        level.popleft()
-                        del self.id_index[bid_id]
-                    else:
-                        level[0] = (bid_id, bid_qty)
-                        self.id_index[bid_id] = ("BUY", best_bid, bid_qty)
-                        break
-
-                if not level:
-                    del self.bids[best_bid]
-                    heapq.heappop(self.bid_heap)
-
-        for fill in fills:
-            self.trades.append(fill)
-
-        return fills
-
-    def _rebuild_heaps(self):
-        """Rebuild heaps from scratch (used after cancel)."""
-        self.bid_heap = [-p for p in self.bids.keys()]
-        self.ask_heap = list(self.asks.keys())
-        heapq.heapify(self.bid_heap)
-        heapq.heapify(self.ask_heap)
+
+            if not level:
+                del levels[best]
+                heappop(heap)
+
+        return remaining
+
+    def _best_price(self, levels: Dict[int, deque], heap: List[int], sign: int) -> Optional[float]:
+        """Best live price on one side, purging dead heads and emptied levels from the top."""
+        while heap:
+            tick = sign * heap[0]
+            level = levels[tick]
+            while level and not level[0].alive:
+                level.popleft()
+            if level:
+                return tick / self._per_unit
+            del levels[tick]
+            heapq.heappop(heap)
+        return None
 
     def snapshot(self) -> dict:
         """Return current best bid/ask for quote logging."""
-        best_bid = -self.bid_heap[0] if self.bid_heap else None
-        best_ask = self.ask_heap[0] if self.ask_heap else None
+        best_bid = self._best_price(self.bids, self.bid_heap, -1)
+        best_ask = self._best_price(self.asks, self.ask_heap, 1)
         return {"bid": best_bid, "ask": best_ask}
 
@@ -1,9 +1,79 @@
 """Deterministic order generator with seeded RNG."""
 
+import io
 import random
 import csv
 import sys
-from typing import TextIO
+from array import array
+from functools import partial
+from typing import BinaryIO, Callable, Iterator, TextIO, Union
+
+# Rows buffered per writerows() call
+WRITE_BATCH = 1 << 16
+# 32-bit words drawn per getrandbits() call in fast mode
+RAND_CHUNK = 1 << 12
+
+
+class _LiveIds:
+    """
+    Live order ids, in ascending order, with O(log n) positional pop.
+
+    Ids are handed out as 1, 2, 3, ..., so the live list is always sorted. A
+    Fenwick tree of per-id counts finds the k-th live id without shifting a list
+    on every cancel. The tree starts with every id 1..n present, which is O(n).
+    Ids not yet handed out sort after all live ids, so they never change a k-th
+    lookup for k < len(self).
+    """
+
+    def __init__(self, n: int):
+        self.size = n
+        self.tree = [i & -i for i in range(n + 1)]
+        self.top = 1 << (n.bit_length() - 1) if n else 0
+        self.live = 0
+
+    def __len__(self) -> int:
+        return self.live
+
+    def append(self, order_id: int):
+        """Mark the next handed-out id live (ids must be appended in increasing order)."""
+        self.live += 1
+
+    def skip(self, order_id: int):
+        """Handed-out id that never goes live (e.g. a CANCEL row's own id)."""
+        self._remove(order_id)
+
+    def pop(self, k: int) -> int:
+        """Remove and return the k-th (0-based) live id."""
+        tree = self.tree
+        pos = 0
+        rem = k + 1
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and tree[nxt] < rem:
+                pos = nxt
+                rem -= tree[nxt]
+            step >>= 1
+        order_id = pos + 1
+        self._remove(order_id)
+        self.live -= 1
+        return order_id
+
+    def _remove(self, i: int):
+        tree = self.tree
+        while i <= self.size:
+            tree[i] -= 1
+            i += i & -i
+
+
+def _prefetched_below(rng: random.Random, k: int) -> Iterator[int]:
+    """Endless stream of ints in [0, k), drawn from rng one large getrandbits() at a time."""
+    while True:
+        words = array("I", rng.getrandbits(32 * RAND_CHUNK).to_bytes(4 * RAND_CHUNK, "little"))
+        if sys.byteorder == "big":
+            words.byteswap()
+        # Multiply-shift maps a 32-bit word onto [0, k); bias is below k / 2**32
+        yield from [w * k >> 32 for w in words]
 
 
 def generate_orders(
@@ -12,7 +82,8 @@ def generate_orders(
     auction_interval_ms: int,
     cross_rate: float,
     tick_size: float = 0.01,
-    output: TextIO = sys.stdout,
+    output: Union[TextIO, BinaryIO] = sys.stdout,
+    fast: bool = False,
 ):
     """
     Generate deterministic CSV of orders.
@@ -23,34 +94,66 @@ def generate_orders(
         auction_interval_ms: Batch auction interval (affects timestamps).
         cross_rate: Fraction of orders that should cross spread (0.0-1.0).
         tick_size: Price tick increment.
-        output: File-like object to write CSV.
+        output: File-like object to write CSV (text, or binary which is wrapped).
+        fast: Draw the integer fields from prefetched random words instead of one Random call each.
+            Still deterministic per seed, but a different stream from the default.
     """
     rng = random.Random(seed)
 
+    # Each fixed-range int draw gets its own zero-argument callable. The default path keeps
+    # the exact Random call sequence (randint(a, b) is a + randrange(b - a + 1))
+    if fast:
+        def draw(k: int) -> Callable[[], int]:
+            return _prefetched_below(rng, k).__next__
+    else:
+        def draw(k: int) -> Callable[[], int]:
+            return partial(rng.randrange, k)
+
     # Start with a drifting mid price
     mid = 100.0
     spread_ticks = 5
     timestamp = 0
 
+    uniform = rng.random
+    drift_sign = draw(2)
+    drift_ticks = draw(3)
+    cross_ticks = draw(spread_ticks + 1)
+    passive_ticks = draw(spread_ticks * 2)
+    qty_draw = draw(100)
+    gap_draw = draw(9901)
+
+    # Binary streams get a text layer; detached again at the end so the caller's stream stays open
+    wrapper = None
+    if isinstance(output, (io.RawIOBase, io.BufferedIOBase)):
+        wrapper = output = io.TextIOWrapper(output, newline="")
+
     writer = csv.writer(output)
     writer.writerow(["timestamp", "order_id", "type", "side", "price", "qty"])
 
-    live_ids = []
+    # Rows are buffered as tuples and emitted with one writerows() call per batch
+    buf = []
+    add_row = buf.append
+    fmt = "%.2f".__mod__
+    # Formatted price per tick count; prices cluster near mid, so nearly every row is a hit
+    price_strs = {}
+
+    live_ids = _LiveIds(n)
     next_id = 1
 
     for i in range(n):
         # Drift mid slightly
-        if rng.random() < 0.1:
-            mid += rng.choice([-1, 1]) * tick_size * rng.randint(1, 3)
+        if uniform() < 0.1:
+            mid += (-1, 1)[drift_sign()] * tick_size * (1 + drift_ticks())
             mid = max(mid, 50.0)  # Floor at 50
 
         # Decide order type
-        type_roll = rng.random()
+        type_roll = uniform()
         if type_roll < 0.05 and live_ids:
             # CANCEL
-            cancel_id = rng.choice(live_ids)
-            live_ids.remove(cancel_id)
-            writer.writerow([timestamp, next_id, "CANCEL", "", cancel_id, ""])
+            # Same draw as rng.choice(live_ids) on the sorted id list
+            cancel_id = live_ids.pop(rng.randrange(len(live_ids)))
+            live_ids.skip(next_id)
+            add_row((timestamp, next_id, "CANCEL", "", cancel_id, ""))
             next_id += 1
         else:
             # Decide LIMIT/MARKET/IOC
@@ -62,42 +165,48 @@ def generate_orders(
                 order_type = "MARKET"
 
             # Decide side
-            side = "BUY" if rng.random() < 0.5 else "SELL"
+            side = "BUY" if uniform() < 0.5 else "SELL"
 
             # Decide price
             if order_type == "MARKET":
-                price = ""
+                price_str = ""
             else:
                 # Decide if crossing
-                if rng.random() < cross_rate:
+                if uniform() < cross_rate:
                     # Aggressive: cross the spread
                     if side == "BUY":
-                        price = mid + tick_size * rng.randint(0, spread_ticks)
+                        price = mid + tick_size * cross_ticks()
                     else:
-                        price = mid - tick_size * rng.randint(0, spread_ticks)
+                        price = mid - tick_size * cross_ticks()
                 else:
                     # Passive: inside spread
                     if side == "BUY":
-                        price = mid - tick_size * rng.randint(1, spread_ticks * 2)
+                        price = mid - tick_size * (1 + passive_ticks())
                     else:
-                        price = mid + tick_size * rng.randint(1, spread_ticks * 2)
+                        price = mid + tick_size * (1 + passive_ticks())
 
-                price = round(price / tick_size) * tick_size
-                price = max(price, tick_size)  # Floor at tick_size
+                ticks = max(round(price / tick_size), 1)  # Floor at tick_size
+                price_str = price_strs.get(ticks)
+                if price_str is None:
+                    price_str = price_strs[ticks] = fmt(ticks * tick_size)
 
             # Quantity
-            qty = rng.randint(1, 100)
+            qty = 1 + qty_draw()
 
-            if order_type != "MARKET":
-                writer.writerow([timestamp, next_id, order_type, side, f"{price:.2f}", qty])
-            else:
-                writer.writerow([timestamp, next_id, order_type, side, "", qty])
+            add_row((timestamp, next_id, order_type, side, price_str, qty))
 
             live_ids.append(next_id)
             next_id += 1
 
         # Increment timestamp (nanoseconds)
-        timestamp += rng.randint(100, 10000)
+        timestamp += 100 + gap_draw()
+
+        if len(buf) >= WRITE_BATCH:
+            writer.writerows(buf)
+            buf.clear()
 
+    writer.writerows(buf)
     output.flush()
+    if wrapper is not None:
+        wrapper.detach()
 
@@ -1,7 +1,7 @@
 """Trade quality metrics: mid, VWAP, slippage."""
 
 import csv
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 
 def compute_mid(quotes: List[dict]) -> Optional[float]:
@@ -18,17 +18,20 @@ def compute_mid(quotes: List[dict]) -> Optional[float]:
 
 def compute_vwap(trades: List[dict]) -> Optional[float]:
     """Compute volume-weighted average price."""
-    if not trades:
-        return None
+    return _vwap_and_volume(trades)[0]
 
+
+def _vwap_and_volume(trades: List[dict]) -> Tuple[Optional[float], int]:
+    """VWAP (None if no volume) and total volume, in one pass over the trades."""
     total_val = 0.0
     total_qty = 0
 
     for t in trades:
-        total_val += t["price"] * t["qty"]
-        total_qty += t["qty"]
+        qty = t["qty"]
+        total_val += t["price"] * qty
+        total_qty += qty
 
-    return total_val / total_qty if total_qty > 0 else None
+    return (total_val / total_qty if total_qty > 0 else None), total_qty
 
 
 def compute_slippage(trades: List[dict], reference_price: float) -> List[float]:
@@ -48,12 +51,12 @@ def signed_slippage_ticks(trades: List[dict], reference_price: float, tick: floa
     Returns:
         List of signed slippage values: ((price - ref)/tick) * (+1 for BUY, -1 for SELL).
     """
-    result = []
-    for t in trades:
-        raw_slippage = (t["price"] - reference_price) / tick
-        sign = 1 if t.get("taker_side") == "BUY" else -1
-        result.append(raw_slippage * sign)
-    return result
+    # Negating instead of multiplying by -1 gives the same floats, signed zeros included
+    return [
+        (t["price"] - reference_price) / tick if t.get("taker_side") == "BUY"
+        else -(t["price"] - reference_price) / tick
+        for t in trades
+    ]
 
 
 def load_trades(path: str) -> List[dict]:
@@ -87,11 +90,9 @@ def load_quotes(path: str) -> List[dict]:
 
 def compare_modes(batch_trades: List[dict], cont_trades: List[dict]) -> str:
     """Generate markdown comparison table."""
-    batch_vwap = compute_vwap(batch_trades)
-    cont_vwap = compute_vwap(cont_trades)
-
-    batch_vol = sum(t["qty"] for t in batch_trades)
-    cont_vol = sum(t["qty"] for t in cont_trades)
+    # VWAP and volume share one pass per mode; slippage needs the VWAP, so it is the second
+    batch_vwap, batch_vol = _vwap_and_volume(batch_trades)
+    cont_vwap, cont_vol = _vwap_and_volume(cont_trades)
 
     # Compute signed slippage (using VWAP as reference)
     batch_slippage_ticks = signed_slippage_ticks(batch_trades, batch_vwap) if batch_vwap and batch_trades else []
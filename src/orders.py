@@ -0,0 +1,166 @@
+"""Column-oriented order storage for the batch path."""
+
+import csv
+import math
+from array import array
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Side codes
+BUY = 0
+SELL = 1
+NO_SIDE = -1  # CANCEL rows carry no side
+
+# Order type codes
+LIMIT = 0
+MARKET = 1
+IOC = 2
+CANCEL = 3
+
+SIDE_CODES = {"BUY": BUY, "SELL": SELL}
+SIDE_NAMES = {BUY: "BUY", SELL: "SELL", NO_SIDE: ""}
+TYPE_CODES = {"LIMIT": LIMIT, "MARKET": MARKET, "IOC": IOC, "CANCEL": CANCEL}
+TYPE_NAMES = ("LIMIT", "MARKET", "IOC", "CANCEL")
+
+# Slack, in ticks, for float noise when snapping a limit to the tick grid
+# (100.07 * 100 is 10006.999999999998, which must still be tick 10007)
+TICK_EPS = 1e-6
+
+
+def bid_tick(price: float, per_unit: float) -> int:
+    """Tick of a buy limit: the highest grid price not above it (per_unit = ticks per unit price)."""
+    return math.floor(price * per_unit + TICK_EPS)
+
+
+def ask_tick(price: float, per_unit: float) -> int:
+    """Tick of a sell limit: the lowest grid price not below it (per_unit = ticks per unit price)."""
+    return math.ceil(price * per_unit - TICK_EPS)
+
+
+@dataclass
+class OrderBatch:
+    """
+    Orders stored as parallel typed arrays (one column per field).
+
+    side and otype are int8 codes (see SIDE_CODES/TYPE_CODES). price is NaN
+    when absent (MARKET, CANCEL); cancel_id holds the target id of CANCEL rows
+    and 0 elsewhere.
+    """
+
+    order_id: array = field(default_factory=lambda: array("q"))
+    side: array = field(default_factory=lambda: array("b"))
+    otype: array = field(default_factory=lambda: array("b"))
+    price: array = field(default_factory=lambda: array("d"))
+    qty: array = field(default_factory=lambda: array("q"))
+    timestamp: array = field(default_factory=lambda: array("q"))
+    cancel_id: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.order_id)
+
+    def append(self, order_id: int, side: int, otype: int, price: float, qty: int,
+               timestamp: int, cancel_id: int = 0):
+        """Append one order given already-encoded fields."""
+        self.order_id.append(order_id)
+        self.side.append(side)
+        self.otype.append(otype)
+        self.price.append(price)
+        self.qty.append(qty)
+        self.timestamp.append(timestamp)
+        self.cancel_id.append(cancel_id)
+
+    @classmethod
+    def from_dicts(cls, orders: Iterable[dict]) -> "OrderBatch":
+        """Build from dicts with 'order_id', 'side', 'type', 'price', 'qty' and optional 'timestamp'."""
+        batch = cls()
+        for o in orders:
+            price = o.get("price")
+            batch.append(
+                o["order_id"],
+                SIDE_CODES.get(o.get("side"), NO_SIDE),
+                TYPE_CODES[o["type"]],
+                math.nan if price is None else price,
+                o.get("qty") or 0,
+                o.get("timestamp", 0),
+                o.get("cancel_id", 0),
+            )
+        return batch
+
+    def take(self, indices: List[int]) -> "OrderBatch":
+        """Return a new batch holding the rows at indices, in that order."""
+        return OrderBatch(*(
+            array(col.typecode, [col[i] for i in indices])
+            for col in (self.order_id, self.side, self.otype, self.price,
+                        self.qty, self.timestamp, self.cancel_id)
+        ))
+
+    def iter_decoded(self) -> Iterator[Tuple[int, str, str, Optional[float], int, int]]:
+        """Yield (order_id, side, type, price, qty, cancel_id) with codes decoded for OrderBook."""
+        for oid, side, otype, price, qty, cancel_id in zip(
+            self.order_id, self.side, self.otype, self.price, self.qty, self.cancel_id,
+        ):
+            yield (
+                oid,
+                SIDE_NAMES[side],
+                TYPE_NAMES[otype],
+                None if math.isnan(price) else price,
+                qty,
+                cancel_id,
+            )
+
+
+def load_orders(path: str) -> OrderBatch:
+    """
+    Load an orders CSV (timestamp, order_id, type, side, price, qty) into an OrderBatch.
+
+    For CANCEL rows the price field holds the target order_id; it is stored in
+    cancel_id and price is left NaN.
+    """
+    batch = OrderBatch()
+
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return batch
+        col = {name: i for i, name in enumerate(header)}
+        fields = itemgetter(col["timestamp"], col["order_id"], col["type"], col["side"], col["price"], col["qty"])
+        width = len(header)
+
+        # Bind casts, lookups and column appends once; rows are unpacked by
+        # header position in C via itemgetter
+        _int = int
+        _float = float
+        nan = math.nan
+        type_codes = TYPE_CODES
+        side_code = SIDE_CODES.get
+        add_id = batch.order_id.append
+        add_side = batch.side.append
+        add_type = batch.otype.append
+        add_price = batch.price.append
+        add_qty = batch.qty.append
+        add_ts = batch.timestamp.append
+        add_cancel = batch.cancel_id.append
+
+        # Like DictReader: blank lines are skipped and short rows padded, all
+        # inside the row iterator so the loop still unpacks fields in C
+        rows = (
+            row if len(row) >= width else row + [""] * (width - len(row))
+            for row in filter(None, reader)
+        )
+        for ts, oid, otype, side, raw_price, raw_qty in map(fields, rows):
+            otype = type_codes[otype]
+            if otype == CANCEL:
+                add_price(nan)
+                add_cancel(_int(raw_price))
+            else:
+                add_price(_float(raw_price) if raw_price else nan)
+                add_cancel(0)
+            add_id(_int(oid))
+            add_side(side_code(side, NO_SIDE))
+            add_type(otype)
+            add_qty(_int(raw_qty) if raw_qty else 0)
+            add_ts(_int(ts))
+
+    return batch
@@ -52,3 +52,75 @@ def test_auction_fifo_allocation():
     assert fills[1]["buyer_id"] == 2
     assert fills[1]["qty"] == 2
 
+
+def test_auction_tie_band_midpoint():
+    """Test the whole tie band is found when volume plateaus."""
+    orders = [
+        {"order_id": 1, "side": "BUY", "price": 100.0, "qty": 10, "type": "LIMIT"},
+        {"order_id": 2, "side": "BUY", "price": 97.0, "qty": 4, "type": "LIMIT"},
+        {"order_id": 3, "side": "SELL", "price": 98.0, "qty": 10, "type": "LIMIT"},
+        {"order_id": 4, "side": "SELL", "price": 99.0, "qty": 5, "type": "LIMIT"},
+    ]
+    
+    # Volume is 10 from 98.0 through 100.0; no pre_mid -> midpoint of the band
+    price, fills = clear_batch(orders)
+    
+    assert abs(price - 99.0) < 1e-9
+    assert sum(f["qty"] for f in fills) == 10
+
+
+def test_auction_midpoint_on_tick_grid():
+    """Test the tie-band midpoint lands exactly on the tick grid and still fills."""
+    orders = [
+        {"order_id": 1, "side": "SELL", "price": 99.95, "qty": 10, "type": "LIMIT"},
+        {"order_id": 2, "side": "BUY", "price": 99.96, "qty": 5, "type": "LIMIT"},
+        {"order_id": 3, "side": "SELL", "price": 99.96, "qty": 5, "type": "LIMIT"},
+    ]
+    
+    # Tie band is 99.95..99.96 and its midpoint rounds to 99.96; float rounding used to
+    # give 99.96000000000001, which priced the 99.96 bid out and produced no fills
+    price, fills = clear_batch(orders)
+    
+    assert price == 99.96
+    assert sum(f["qty"] for f in fills) == 5
+
+
+def test_auction_tiebreak_equidistant_picks_lowest():
+    """Test prices equally close to pre_mid resolve to the lowest one."""
+    orders = [
+        {"order_id": 1, "side": "BUY", "price": 100.03, "qty": 10, "type": "LIMIT"},
+        {"order_id": 2, "side": "SELL", "price": 100.02, "qty": 10, "type": "LIMIT"},
+    ]
+    
+    price, fills = clear_batch(orders, pre_mid=100.025)
+    
+    assert price == 100.02
+    assert sum(f["qty"] for f in fills) == 10
+
+
+def test_auction_fifo_by_timestamp_not_arrival():
+    """Test FIFO follows timestamp even when rows arrive out of time order."""
+    orders = [
+        {"order_id": 1, "side": "BUY", "price": 100.0, "qty": 5, "type": "LIMIT", "timestamp": 30},
+        {"order_id": 2, "side": "BUY", "price": 100.0, "qty": 5, "type": "LIMIT", "timestamp": 10},
+        {"order_id": 3, "side": "BUY", "price": 100.0, "qty": 5, "type": "LIMIT", "timestamp": 20},
+        {"order_id": 4, "side": "SELL", "price": 99.0, "qty": 7, "type": "LIMIT", "timestamp": 0},
+    ]
+
+    price, fills = clear_batch(orders)
+
+    assert [(f["buyer_id"], f["qty"]) for f in fills] == [(2, 5), (3, 2)]
+
+
+def test_auction_off_grid_limit_not_traded_through():
+    """Test an off-grid limit snaps away from the market instead of trading through its limit."""
+    orders = [
+        {"order_id": 1, "side": "SELL", "price": 100.004, "qty": 5, "type": "LIMIT"},
+        {"order_id": 2, "side": "BUY", "price": 100.00, "qty": 5, "type": "LIMIT"},
+    ]
+
+    price, fills = clear_batch(orders)
+
+    assert price is None
+    assert fills == []
+
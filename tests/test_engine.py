@@ -1,6 +1,7 @@
 """Tests for continuous order book engine."""
 
 import pytest
+from src import engine
 from src.engine import OrderBook
 
 
@@ -48,8 +49,8 @@ def test_partial_fill():
     assert fills[0]["qty"] == 3
     
     # Remaining 7 should still be on book
-    assert 100.0 in book.asks
-    assert book.asks[100.0][0][1] == 7
+    assert book.tick_key(100.0, "SELL") in book.asks
+    assert book.asks[book.tick_key(100.0, "SELL")][0].qty == 7
 
 
 def test_ioc_partial_cancel():
@@ -115,3 +116,89 @@ def test_no_trade_no_cross():
     assert len(book.bids) == 1
     assert len(book.asks) == 1
 
+
+def test_off_grid_limit_not_traded_through():
+    """Test off-grid limits snap away from the market instead of trading through their limit."""
+    book = OrderBook()
+
+    book.add_order(1, "SELL", 100.004, 5, "LIMIT")
+    fills = book.add_order(2, "BUY", 100.0, 5, "LIMIT")
+
+    assert len(fills) == 0
+    assert book.snapshot() == {"bid": 100.0, "ask": 100.01}
+
+
+def test_cancel_skipped_by_matching():
+    """Test cancelled resting orders are skipped and best quotes stay live."""
+    book = OrderBook()
+
+    book.add_order(1, "SELL", 100.0, 5, "LIMIT")
+    book.add_order(2, "SELL", 100.0, 5, "LIMIT")
+    book.add_order(3, "SELL", 101.0, 5, "LIMIT")
+
+    assert book.cancel_order(1) is True
+    assert book.cancel_order(1) is False
+
+    fills = book.add_order(4, "BUY", 101.0, 7, "LIMIT")
+    assert [(f["seller_id"], f["price"], f["qty"]) for f in fills] == [(2, 100.0, 5), (3, 101.0, 2)]
+
+    # Cancelling the only order at the best level moves the quote
+    book.cancel_order(3)
+    assert book.snapshot() == {"bid": None, "ask": None}
+
+
+def test_trade_log_views():
+    """Test the columnar trade log reads back as dicts and rows."""
+    book = OrderBook()
+
+    book.add_order(1, "BUY", 100.0, 5, "LIMIT")
+    book.add_order(2, "SELL", 101.0, 5, "LIMIT")
+    book.add_order(3, "SELL", 99.0, 3, "IOC")
+    fills = book.add_order(4, "BUY", 101.0, 2, "LIMIT")
+
+    assert fills == [{"buyer_id": 4, "seller_id": 2, "price": 101.0, "qty": 2, "taker_side": "BUY"}]
+    assert book.trade_count == 2
+    assert book.trades[0] == {"buyer_id": 1, "seller_id": 3, "price": 100.0, "qty": 3, "taker_side": "SELL"}
+    assert list(book.trade_rows()) == [(1, 3, 100.0, 3, "SELL"), (4, 2, 101.0, 2, "BUY")]
+    assert repr(fills) == repr([{"buyer_id": 4, "seller_id": 2, "price": 101.0, "qty": 2, "taker_side": "BUY"}])
+
+    # Orders that do not trade return an empty view of the same type
+    no_fills = book.add_order(5, "BUY", 90.0, 1, "LIMIT")
+    assert type(no_fills) is type(fills)
+    assert no_fills == [] and len(no_fills) == 0
+
+    # trades keeps the dicts it has built and only converts new fills
+    trades = book.trades
+    assert book.trades is trades
+    book.add_order(6, "SELL", 90.0, 1, "LIMIT")
+    assert book.trades is trades and len(trades) == 3
+
+
+def test_quote_ring(monkeypatch):
+    """Test the quote ring hands full rings to the sink and otherwise keeps the latest quotes."""
+    monkeypatch.setattr(engine, "QUOTE_RING", 2)
+
+    # Quotes are recorded only through log_quote()
+    book = OrderBook()
+    assert book.quotes == []
+    with pytest.raises(AttributeError):
+        book.quotes = []
+
+    rows = []
+    book = OrderBook(quote_sink=rows.extend)
+    book.log_quote()
+    book.add_order(1, "BUY", 99.0, 5, "LIMIT")
+    book.log_quote()
+    book.add_order(2, "SELL", 101.0, 5, "LIMIT")
+    book.log_quote()
+    assert rows == [(None, None), (99.0, None)]
+    book.flush_quotes()
+    assert rows == [(None, None), (99.0, None), (99.0, 101.0)]
+
+    book = OrderBook()
+    book.log_quote()
+    book.add_order(1, "BUY", 99.0, 5, "LIMIT")
+    book.log_quote()
+    book.add_order(2, "SELL", 101.0, 5, "LIMIT")
+    book.log_quote()
+    assert book.quotes == [{"bid": 99.0, "ask": None}, {"bid": 99.0, "ask": 101.0}]
@@ -3,12 +3,16 @@
 import pytest
 import tempfile
 import csv
+import json
 import os
+from argparse import Namespace
 from io import StringIO
 
 from src.gen import generate_orders
 from src.engine import OrderBook
 from src.auction import clear_batch
+from src.cli import _simulate_batch, cmd_benchmark
+from src.orders import load_orders
 
 
 def test_generator_determinism():
@@ -22,6 +26,17 @@ def test_generator_determinism():
     assert output1.getvalue() == output2.getvalue()
 
 
+def test_generator_fast_determinism():
+    """Test the prefetched-RNG generator is deterministic per seed."""
+    output1 = StringIO()
+    output2 = StringIO()
+
+    generate_orders(n=100, seed=42, auction_interval_ms=1000, cross_rate=0.2, output=output1, fast=True)
+    generate_orders(n=100, seed=42, auction_interval_ms=1000, cross_rate=0.2, output=output2, fast=True)
+
+    assert output1.getvalue() == output2.getvalue()
+
+
 def test_batch_vs_continuous_consistency():
     """Test that batch and continuous modes are internally consistent."""
     # Generate small order set
@@ -57,3 +72,55 @@ def test_batch_vs_continuous_consistency():
     # Both should produce trades (consistency check)
     assert isinstance(book.trades, list)
 
+
+def test_parallel_batches_match_serial(tmp_path):
+    """Test that clearing batches in worker processes gives identical output."""
+    path = tmp_path / "orders.csv"
+    with open(path, "w") as f:
+        generate_orders(n=300, seed=7, auction_interval_ms=100, cross_rate=0.3, output=f)
+    orders = load_orders(str(path))
+
+    for name, workers in (("serial", 1), ("parallel", 2)):
+        os.makedirs(tmp_path / name)
+        _simulate_batch(orders, 100, str(tmp_path / name), workers)
+
+    for fname in ("trades.csv", "quotes.csv"):
+        assert (tmp_path / "serial" / fname).read_text() == (tmp_path / "parallel" / fname).read_text()
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_generator_cancels_live_orders(fast):
+    """Test every generated CANCEL targets an earlier, not yet cancelled order."""
+    output = StringIO()
+    generate_orders(n=2000, seed=3, auction_interval_ms=1000, cross_rate=0.2, output=output, fast=fast)
+    output.seek(0)
+
+    live = set()
+    n_cancels = 0
+    for row in csv.DictReader(output):
+        if row["type"] == "CANCEL":
+            target = int(row["price"])
+            assert target in live
+            live.remove(target)
+            n_cancels += 1
+        else:
+            live.add(int(row["order_id"]))
+
+    assert n_cancels > 0
+
+
+@pytest.mark.parametrize("mode", ["batch", "continuous"])
+def test_benchmark_command(tmp_path, mode):
+    """Smoke test the benchmark command end to end in both modes."""
+    path = tmp_path / "orders.csv"
+    with open(path, "w") as f:
+        generate_orders(n=300, seed=7, auction_interval_ms=100, cross_rate=0.3, output=f)
+
+    out = tmp_path / "bench"
+    cmd_benchmark(Namespace(input=str(path), mode=mode, interval=100, out=str(out)))
+
+    bench = json.loads((out / "bench.json").read_text())
+    assert bench["mode"] == mode
+    assert bench["orders_processed"] == 300
+    assert (out / "trades.csv").read_text().startswith("buyer_id,seller_id,price,qty,taker_side")
+
@@ -1,7 +1,7 @@
 """Tests for metrics computation."""
 
 import pytest
-from src.metrics import compute_vwap, compute_mid, compute_slippage
+from src.metrics import compute_vwap, compute_mid, compute_slippage, signed_slippage_ticks, load_trades
 
 
 def test_vwap_calculation():
@@ -39,3 +39,30 @@ def test_slippage_calculation():
     assert slippage[0] == 0.5
     assert slippage[1] == -0.5
 
+
+def test_signed_slippage_ticks():
+    """Test slippage sign follows taker side (missing side counts as SELL)."""
+    trades = [
+        {"price": 100.05, "qty": 1, "taker_side": "BUY"},
+        {"price": 100.05, "qty": 1, "taker_side": "SELL"},
+        {"price": 99.98, "qty": 1},
+    ]
+
+    ticks = signed_slippage_ticks(trades, 100.0)
+    assert [round(x, 6) for x in ticks] == [5.0, -5.0, 2.0]
+
+
+def test_load_trades_keeps_csv_fields(tmp_path):
+    """Test loaded trades carry exactly the CSV columns and slippage signs follow taker_side."""
+    path = tmp_path / "trades.csv"
+    path.write_text(
+        "buyer_id,seller_id,price,qty,taker_side\n"
+        "1,2,100.05,1,BUY\n"
+        "3,4,100.05,1,SELL\n"
+    )
+
+    trades = load_trades(str(path))
+    assert [list(t) for t in trades] == [["buyer_id", "seller_id", "price", "qty", "taker_side"]] * 2
+
+    ticks = signed_slippage_ticks(trades, 100.0)
+    assert [round(x, 6) for x in ticks] == [5.0, -5.0]
@@ -0,0 +1,94 @@
+"""Tests for column-oriented order storage."""
+
+import math
+
+import pytest
+from src.orders import OrderBatch, load_orders, BUY, SELL, NO_SIDE, LIMIT, MARKET, CANCEL
+from src.auction import clear_batch
+
+
+def test_from_dicts_encoding():
+    """Test side/type codes and absent prices."""
+    batch = OrderBatch.from_dicts([
+        {"order_id": 1, "side": "BUY", "price": 100.0, "qty": 10, "type": "LIMIT", "timestamp": 5},
+        {"order_id": 2, "side": "SELL", "price": None, "qty": 3, "type": "MARKET"},
+        {"order_id": 3, "side": "", "price": 1.0, "qty": 0, "type": "CANCEL", "cancel_id": 1},
+    ])
+
+    assert len(batch) == 3
+    assert list(batch.side) == [BUY, SELL, NO_SIDE]
+    assert list(batch.otype) == [LIMIT, MARKET, CANCEL]
+    assert math.isnan(batch.price[1])
+    assert list(batch.timestamp) == [5, 0, 0]
+    assert list(batch.cancel_id) == [0, 0, 1]
+
+
+def test_take_selects_rows():
+    """Test take returns rows in the requested order."""
+    batch = OrderBatch.from_dicts([
+        {"order_id": i, "side": "BUY", "price": 100.0 + i, "qty": i, "type": "LIMIT"}
+        for i in range(1, 5)
+    ])
+
+    sub = batch.take([3, 1])
+    assert list(sub.order_id) == [4, 2]
+    assert list(sub.price) == [104.0, 102.0]
+    assert sub.qty.typecode == batch.qty.typecode
+
+
+def test_clear_batch_accepts_order_batch():
+    """Test clear_batch gives the same result for dicts and OrderBatch."""
+    orders = [
+        {"order_id": 1, "side": "BUY", "price": 100.0, "qty": 5, "type": "LIMIT"},
+        {"order_id": 2, "side": "BUY", "price": None, "qty": 5, "type": "MARKET"},
+        {"order_id": 3, "side": "SELL", "price": 99.0, "qty": 7, "type": "LIMIT"},
+    ]
+
+    assert clear_batch(OrderBatch.from_dicts(orders)) == clear_batch(orders)
+
+
+def test_load_orders(tmp_path):
+    """Test CSV loading, including CANCEL target ids and MARKET prices."""
+    path = tmp_path / "orders.csv"
+    path.write_text(
+        "timestamp,order_id,type,side,price,qty\n"
+        "0,1,LIMIT,BUY,100.25,10\n"
+        "100,2,MARKET,SELL,,4\n"
+        "200,3,CANCEL,,1,\n"
+    )
+
+    batch = load_orders(str(path))
+
+    assert list(batch.order_id) == [1, 2, 3]
+    assert list(batch.timestamp) == [0, 100, 200]
+    assert list(batch.qty) == [10, 4, 0]
+    assert batch.price[0] == 100.25
+    assert math.isnan(batch.price[1]) and math.isnan(batch.price[2])
+    assert list(batch.cancel_id) == [0, 0, 1]
+    assert list(batch.iter_decoded()) == [
+        (1, "BUY", "LIMIT", 100.25, 10, 0),
+        (2, "SELL", "MARKET", None, 4, 0),
+        (3, "", "CANCEL", None, 0, 1),
+    ]
+
+
+def test_load_orders_blank_lines_and_short_rows(tmp_path):
+    """Test blank lines are skipped and missing trailing fields read as empty, as with DictReader."""
+    path = tmp_path / "orders.csv"
+    path.write_bytes(
+        b"timestamp,order_id,type,side,price,qty\r\n"
+        b"0,1,LIMIT,SELL,100.00,5\r\n"
+        b"\r\n"
+        b"5,2,LIMIT,BUY,100.00,5\r\n"
+        b"9,3,CANCEL,,1\r\n"
+        b"\r\n"
+    )
+
+    batch = load_orders(str(path))
+
+    assert list(batch.iter_decoded()) == [
+        (1, "SELL", "LIMIT", 100.0, 5, 0),
+        (2, "BUY", "LIMIT", 100.0, 5, 0),
+        (3, "", "CANCEL", None, 0, 1),
+    ]
+